@@ -1,13 +1,64 @@
+import asyncio
+
 import streamlit as st
-import pandas as pd
 from dotenv import load_dotenv
 import os
+from dataclasses import asdict
 
 # Ensure the import matches your filename (main.py)
 from main import BasicBot
 
 load_dotenv()
 
+@st.cache_resource
+def _get_bot(api_key: str, api_secret: str) -> BasicBot:
+    # Reuse one client per credential pair across reruns instead of reconnecting
+    bot = BasicBot(api_key, api_secret, testnet=True)
+    bot.start_user_stream()
+    return bot
+
+@st.cache_data(ttl=1)
+def _cached_dashboard(_bot: BasicBot, api_key: str):
+    # The leading underscore keeps Streamlit from hashing the bot; api_key scopes the cache.
+    # Open orders come from the websocket cache when it is live; otherwise both are REST
+    # round-trips, so fetch them together. The short TTL keeps the orders table fresh.
+    return asyncio.run(_bot.fetch_dashboard())
+
+# Reruns triggered inside this panel only re-execute the panel, not the whole script
+@st.experimental_fragment
+def _orders_panel(bot: BasicBot):
+    st.header("📋 Open Orders")
+    try:
+        if st.button("Refresh Open Orders"):
+            bot.resync_open_orders()
+            _cached_dashboard.clear()
+        df_orders = _cached_dashboard(bot, bot.client.API_KEY)['open_orders']
+    except Exception as e:
+        st.error(f"Could not fetch orders: {e}")
+        return
+
+    if df_orders.empty:
+        st.info("No open orders found.")
+    else:
+        # --- THIS IS THE CORRECTED LINE ---
+        # We now use 'order_id' and 'quantity' to match the keys from main.py
+        st.dataframe(df_orders[['symbol', 'order_id', 'side', 'type', 'quantity', 'price', 'status']])
+
+        st.subheader("Cancel an Order")
+        # A form so typing an ID does not rerun the panel on every keystroke
+        with st.form("cancel_form"):
+            cancel_id = st.text_input("Order ID to Cancel")
+            if st.form_submit_button("Cancel Order"):
+                try:
+                    target_order = df_orders[df_orders['order_id'] == int(cancel_id)].iloc[0]
+                    with st.spinner(f"Cancelling order {cancel_id}..."):
+                        cancel_result = bot.cancel_order(target_order['symbol'], int(cancel_id))
+                    _cached_dashboard.clear()
+                    st.success(f"Order {cancel_id} cancelled.")
+                    st.json(cancel_result)
+                except Exception as e:
+                    st.error(f"Failed to cancel order: {e}")
+
 st.set_page_config(layout="wide")
 st.title("Binance Futures Trading Bot 📈")
 
@@ -26,7 +77,7 @@ if st.sidebar.button("Connect to Binance"):
     else:
         try:
             with st.spinner("Connecting..."):
-                st.session_state.bot = BasicBot(api_key, api_secret, testnet=True)
+                st.session_state.bot = _get_bot(api_key, api_secret)
             st.sidebar.success("✅ Connected successfully!")
         except Exception as e:
             st.sidebar.error(f"Connection failed: {e}")
@@ -39,13 +90,13 @@ if st.session_state.bot:
     with st.expander("📊 Account Balance", expanded=True):
         # (Balance display code is correct)
         try:
-            balance_info = bot.get_account_balance()
+            balance_info = _cached_dashboard(bot, bot.client.API_KEY)['balance']
             col1, col2, col3 = st.columns(3)
             col1.metric("Total Margin Balance", f"${balance_info['total_margin_balance']:.2f}")
             col2.metric("Available Balance", f"${balance_info['available_balance']:.2f}")
             pnl = balance_info['total_unrealized_pnl']
             col3.metric("Unrealized PnL", f"${pnl:.2f}", delta=f"{pnl:.2f}")
-            st.dataframe(pd.DataFrame(balance_info['balances']))
+            st.dataframe(balance_info['balances'])
         except Exception as e:
             st.error(f"Could not retrieve balance: {e}")
 
@@ -60,10 +111,11 @@ if st.session_state.bot:
             order_type = st.selectbox("Order Type", ["MARKET", "LIMIT"])
             symbol = st.text_input("Symbol (e.g., BTCUSDT)").upper()
             side = st.selectbox("Side", ["BUY", "SELL"])
-            quantity = st.number_input("Quantity", min_value=0.0, format="%.5f")
-            price = 0.0
+            # Kept as text so the exact digits typed reach the bot without a float round-trip
+            quantity = st.text_input("Quantity", placeholder="0.001")
+            price = ""
             if order_type == "LIMIT":
-                price = st.number_input("Price", min_value=0.0, format="%.2f")
+                price = st.text_input("Price", placeholder="60000.00")
             submitted = st.form_submit_button("Place Order")
             if submitted:
                 try:
@@ -71,40 +123,13 @@ if st.session_state.bot:
                         order_result = bot.place_market_order(symbol, side, quantity)
                     else:
                         order_result = bot.place_limit_order(symbol, side, quantity, price)
+                    _cached_dashboard.clear()
                     st.success("Order placed successfully!")
-                    st.json(order_result)
+                    st.json(asdict(order_result))
                 except Exception as e:
                     st.error(f"Order failed: {e}")
 
     with col2:
-        st.header("📋 Open Orders")
-        if st.button("Refresh Open Orders"):
-            try:
-                open_orders = bot.get_open_orders()
-                st.session_state.open_orders = open_orders
-                if not open_orders:
-                    st.info("No open orders found.")
-            except Exception as e:
-                st.error(f"Could not fetch orders: {e}")
-
-        if 'open_orders' in st.session_state and st.session_state.open_orders:
-            df_orders = pd.DataFrame(st.session_state.open_orders)
-            
-            # --- THIS IS THE CORRECTED LINE ---
-            # We now use 'order_id' and 'quantity' to match the keys from main.py
-            st.dataframe(df_orders[['symbol', 'order_id', 'side', 'type', 'quantity', 'price', 'status']])
-
-            st.subheader("Cancel an Order")
-            cancel_id = st.text_input("Order ID to Cancel")
-            if st.button("Cancel Order"):
-                try:
-                    target_order = df_orders[df_orders['order_id'] == int(cancel_id)].iloc[0]
-                    with st.spinner(f"Cancelling order {cancel_id}..."):
-                        cancel_result = bot.cancel_order(target_order['symbol'], int(cancel_id))
-                    st.success(f"Order {cancel_id} cancelled.")
-                    st.json(cancel_result)
-                    del st.session_state.open_orders # Clear cache to force refresh
-                except Exception as e:
-                    st.error(f"Failed to cancel order: {e}")
+        _orders_panel(bot)
 else:
     st.info("Please connect to your Binance Testnet account using the sidebar.")
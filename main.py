@@ -1,20 +1,62 @@
+import asyncio
+import atexit
+import functools
 import logging
+import logging.handlers
+import operator
 import os
+import queue
+import re
 import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 
-from binance import Client
-from binance.exceptions import BinanceAPIException, BinanceOrderException
 from dotenv import load_dotenv
 from colorama import Fore, init
-from tabulate import tabulate
+
+# pandas, binance and requests are imported where first needed so that importing
+# this module (e.g. from the Streamlit app) does not pay for them up front
+if TYPE_CHECKING:
+    import pandas as pd
+    from binance import ThreadedWebsocketManager
 
 load_dotenv()
 
-# Initialize colorama
-init(autoreset=True)
+_DECIMAL_RE = re.compile(r'\d+(\.\d*)?|\.\d+')
+
+def _to_units(value: str, scale: int) -> int:
+    """Parses a decimal string into an integer count of 10**-scale units, truncating extra digits."""
+    value = value.strip()
+    if not _DECIMAL_RE.fullmatch(value):
+        raise ValueError(f"Invalid number: {value!r}")
+    whole, _, frac = value.partition('.')
+    return int((whole or '0') + frac[:scale].ljust(scale, '0'))
+
+def _normalize_symbol(func):
+    """Upper-cases the ``symbol`` argument once at the public API boundary."""
+    @functools.wraps(func)
+    def wrapper(self, symbol=None, *args, **kwargs):
+        return func(self, symbol.upper() if symbol else symbol, *args, **kwargs)
+    return wrapper
+
+@dataclass(slots=True)
+class Order:
+    """A single order in the bot's normalized shape."""
+    order_id: int
+    symbol: str
+    side: str
+    type: str
+    quantity: float
+    price: float
+    status: str
+
+ORDER_COLUMNS = [f.name for f in fields(Order)]
+# Flat field tuple for DataFrame.from_records; dataclasses.astuple deep-copies every field
+_order_row = operator.attrgetter(*ORDER_COLUMNS)
 
 class TradingBotLogger:
     """Custom logger for trading bot operations"""
@@ -25,10 +67,14 @@ class TradingBotLogger:
             formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
             file_handler = logging.FileHandler(log_file)
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
             console_handler = logging.StreamHandler()
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            # Callers only enqueue records; a background thread does the actual I/O
+            log_queue = queue.Queue(-1)
+            self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+            listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+            listener.start()
+            atexit.register(listener.stop)
     
     def info(self, message: str): self.logger.info(message)
     def error(self, message: str): self.logger.error(message)
@@ -37,18 +83,38 @@ class TradingBotLogger:
 
 class BasicBot:
     """Simplified Trading Bot for Binance Futures Testnet"""
+
+    EXCHANGE_INFO_TTL = 3600  # seconds
     
     def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
         self.logger = TradingBotLogger()
         self._symbol_info_cache: Dict[str, Any] = {}
+        self._exchange_info_ts: Optional[float] = None
+        from binance import Client
         self.client = Client(api_key=api_key, api_secret=api_secret, testnet=testnet)
         self.client.FUTURES_URL = 'https://testnet.binancefuture.com/fapi'
+        self._testnet = testnet
+        self._user_stream: Optional['ThreadedWebsocketManager'] = None
+        self._open_orders_cache: Dict[int, Order] = {}
+        self._open_orders_lock = threading.Lock()
+        self._pending_updates: Optional[List[Order]] = None
+        self._resync_lock = threading.Lock()
+        self._stream_synced = False
+        self._configure_session()
         self._test_connection()
         self.logger.info("Trading bot initialized successfully")
     
+    def _configure_session(self):
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        # Keep-alive pool sized for concurrent dashboard fetches and resyncs; only retry idempotent GETs
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({'GET'}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+        self.client.session.mount('https://', adapter)
+
     def _test_connection(self):
         try:
-            self.client.futures_ping()
             self.client.futures_account()
             self.logger.info("API connection successful")
         except Exception as e:
@@ -56,8 +122,11 @@ class BasicBot:
             raise
 
     def get_account_balance(self) -> Dict[str, Any]:
+        import pandas as pd
         account = self.client.futures_account()
-        balances = [b for b in account['assets'] if float(b['walletBalance']) > 0]
+        assets = pd.DataFrame(account['assets'], columns=['asset', 'walletBalance']).astype({'asset': 'string[pyarrow]'})
+        assets['walletBalance'] = assets['walletBalance'].astype(float)
+        balances = assets.loc[assets['walletBalance'] > 0].reset_index(drop=True)
         return {
             'total_margin_balance': float(account['totalMarginBalance']),
             'available_balance': float(account['availableBalance']),
@@ -65,79 +134,250 @@ class BasicBot:
             'balances': balances
         }
 
+    @staticmethod
+    def _extract_symbol_info(s: Dict[str, Any]) -> Dict[str, Any]:
+        lot_size = next((f for f in s['filters'] if f['filterType'] == 'LOT_SIZE'), {})
+        min_qty = Decimal(lot_size.get('minQty', '0'))
+        step_size = Decimal(lot_size.get('stepSize', '0'))
+        # Decimal places needed to express min_qty and step_size as whole "units"
+        step_scale = max(0, -min_qty.normalize().as_tuple().exponent,
+                         -step_size.normalize().as_tuple().exponent)
+        return {
+            'price_precision': s['pricePrecision'],
+            'quantity_precision': s['quantityPrecision'],
+            'min_qty': min_qty,
+            'step_size': step_size,
+            'step_scale': step_scale,
+            'step_int': int(step_size.scaleb(step_scale)),
+            'min_qty_int': int(min_qty.scaleb(step_scale)),
+        }
+
+    @_normalize_symbol
     def get_symbol_info(self, symbol: str) -> Dict[str, Any]:
-        symbol_upper = symbol.upper()
-        if symbol_upper in self._symbol_info_cache:
-            return self._symbol_info_cache[symbol_upper]
+        return self._lookup_symbol_info(symbol)
+
+    def _lookup_symbol_info(self, symbol: str) -> Dict[str, Any]:
+        """Looks up an already upper-cased symbol in the exchange info cache."""
+        stale = (self._exchange_info_ts is None
+                 or time.monotonic() - self._exchange_info_ts > self.EXCHANGE_INFO_TTL)
+        if symbol in self._symbol_info_cache and not stale:
+            return self._symbol_info_cache[symbol]
         try:
-            exchange_info = self.client.futures_exchange_info()
-            for s in exchange_info['symbols']:
-                if s['symbol'] == symbol_upper:
-                    info = {
-                        'price_precision': s['pricePrecision'],
-                        'quantity_precision': s['quantityPrecision'],
-                        'min_qty': Decimal(next(f['minQty'] for f in s['filters'] if f['filterType'] == 'LOT_SIZE')),
-                        'step_size': Decimal(next(f['stepSize'] for f in s['filters'] if f['filterType'] == 'LOT_SIZE')),
-                    }
-                    self._symbol_info_cache[symbol_upper] = info
-                    return info
-            raise ValueError(f"Symbol {symbol_upper} not found")
+            if stale:
+                exchange_info = self.client.futures_exchange_info()
+                self._symbol_info_cache = {
+                    s['symbol']: self._extract_symbol_info(s) for s in exchange_info['symbols']
+                }
+                self._exchange_info_ts = time.monotonic()
+            if symbol not in self._symbol_info_cache:
+                raise ValueError(f"Symbol {symbol} not found")
+            return self._symbol_info_cache[symbol]
         except Exception as e:
-            self.logger.error(f"Failed to get symbol info for {symbol_upper}: {e}")
+            self.logger.error(f"Failed to get symbol info for {symbol}: {e}")
             raise
 
+    @_normalize_symbol
     def get_current_price(self, symbol: str) -> float:
         try:
-            ticker = self.client.futures_symbol_ticker(symbol=symbol.upper())
+            ticker = self.client.futures_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
         except Exception as e:
             self.logger.error(f"Failed to get price for {symbol}: {e}")
             raise
 
-    def _validate_and_format_quantity(self, symbol: str, quantity: float) -> str:
-        symbol_info = self.get_symbol_info(symbol)
-        min_qty = symbol_info['min_qty']
-        step_size = symbol_info['step_size']
-        quantity_dec = Decimal(str(quantity))
-        if quantity_dec < min_qty:
-            raise ValueError(f"Quantity {quantity} is below minimum {min_qty}")
-        adjusted_quantity = (quantity_dec // step_size) * step_size
-        return f"{adjusted_quantity:.{symbol_info['quantity_precision']}f}"
-
-    def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
-        params = {'symbol': symbol.upper()} if symbol else {}
-        orders = self.client.futures_get_open_orders(**params)
-        return [self._format_order_response(o) for o in orders]
-
-    def place_market_order(self, symbol: str, side: str, quantity: float) -> Dict[str, Any]:
+    def _validate_and_format_quantity(self, symbol: str, quantity: str) -> str:
+        symbol_info = self._lookup_symbol_info(symbol)
+        scale = 10 ** symbol_info['step_scale']
+        quantity_int = _to_units(quantity, symbol_info['step_scale'])
+        if quantity_int < symbol_info['min_qty_int']:
+            raise ValueError(f"Quantity {quantity} is below minimum {symbol_info['min_qty']}")
+        step_int = symbol_info['step_int']
+        if step_int:
+            quantity_int = (quantity_int // step_int) * step_int
+        return f"{quantity_int / scale:.{symbol_info['quantity_precision']}f}"
+
+    OPEN_ORDER_STATUSES = ('NEW', 'PARTIALLY_FILLED')
+    USER_STREAM_START_TIMEOUT = 10  # seconds
+    USER_STREAM_PATH = 'futures_user'
+
+    def start_user_stream(self):
+        """Mirrors open orders locally from the futures user-data websocket."""
+        if self._user_stream is not None:
+            return
+        twm = None
+        try:
+            from binance import ThreadedWebsocketManager
+            twm = ThreadedWebsocketManager(
+                api_key=self.client.API_KEY, api_secret=self.client.API_SECRET, testnet=self._testnet
+            )
+            twm.daemon = True
+            twm.start()
+            # start_futures_user_socket busy-waits for the manager's client with no timeout, and
+            # the manager thread simply dies if AsyncClient.create fails, so wait here with a bound
+            deadline = time.monotonic() + self.USER_STREAM_START_TIMEOUT
+            while twm._bsm is None:
+                if not twm.is_alive() or time.monotonic() > deadline:
+                    raise TimeoutError("websocket manager did not start")
+                time.sleep(0.1)
+            self._stream_synced = False
+            self._user_stream = twm
+            # Schedule the listener ourselves (as start_futures_user_socket would) to get a future
+            # that reports listen-key or connect failures, which otherwise die silently
+            socket = twm._bsm.futures_user_socket()
+            twm._socket_running[self.USER_STREAM_PATH] = True
+            listener = asyncio.run_coroutine_threadsafe(
+                twm.start_listener(socket, self.USER_STREAM_PATH, self._handle_user_event), twm._loop
+            )
+            listener.add_done_callback(functools.partial(self._on_user_stream_closed, twm))
+            # Subscribe before taking the snapshot; the socket still connects asynchronously,
+            # so _handle_user_event reconciles again once the first event arrives
+            self.resync_open_orders()
+            if self._user_stream is twm:
+                self.logger.info("User data stream started")
+        except Exception as e:
+            self._user_stream = None
+            if twm is not None:
+                twm.stop()
+            self.logger.warning(f"User data stream unavailable, falling back to REST: {e}")
+
+    def stop_user_stream(self):
+        stream, self._user_stream = self._user_stream, None
+        if stream is not None:
+            stream.stop()
+
+    def _on_user_stream_closed(self, twm: 'ThreadedWebsocketManager', listener):
+        # start_listener only clears its entry on a clean exit; a stale one keeps the manager alive
+        twm._socket_running.pop(self.USER_STREAM_PATH, None)
+        if self._user_stream is not twm:
+            return
+        reason = 'cancelled' if listener.cancelled() else listener.exception()
+        self.logger.warning(f"User data stream closed, falling back to REST: {reason}")
+        self.stop_user_stream()
+
+    def resync_open_orders(self):
+        """Replaces the streamed open-orders cache with a fresh REST snapshot."""
+        if self._user_stream is None:
+            return
+        with self._resync_lock:
+            # Updates that arrive while the snapshot is in flight are replayed on top of it
+            with self._open_orders_lock:
+                self._pending_updates = []
+            try:
+                orders = self.client.futures_get_open_orders()
+            except Exception:
+                with self._open_orders_lock:
+                    self._pending_updates = None
+                raise
+            with self._open_orders_lock:
+                cache = {o['orderId']: self._format_order_response(o) for o in orders}
+                for order in self._pending_updates:
+                    self._apply_order_update(cache, order)
+                self._pending_updates = None
+                self._open_orders_cache = cache
+
+    def _reconcile_open_orders(self):
+        try:
+            self.resync_open_orders()
+        except Exception as e:
+            self.logger.warning(f"Failed to resync open orders: {e}")
+
+    def _apply_order_update(self, cache: Dict[int, Order], order: Order):
+        if order.status in self.OPEN_ORDER_STATUSES:
+            cache[order.order_id] = order
+        else:
+            cache.pop(order.order_id, None)
+
+    def _record_order_update(self, order: Order):
+        with self._open_orders_lock:
+            self._apply_order_update(self._open_orders_cache, order)
+            if self._pending_updates is not None:
+                self._pending_updates.append(order)
+
+    def _handle_user_event(self, msg: Dict[str, Any]):
+        if msg.get('e') == 'error':
+            # The socket has given up reconnecting; serve open orders from REST again
+            self.logger.warning(f"User data stream error, falling back to REST: {msg.get('m')}")
+            self.stop_user_stream()
+            return
+        if not self._stream_synced:
+            # The socket connects asynchronously, so the initial snapshot may predate it;
+            # reconcile once the stream is demonstrably live
+            self._stream_synced = True
+            threading.Thread(target=self._reconcile_open_orders, daemon=True).start()
+        if msg.get('e') != 'ORDER_TRADE_UPDATE':
+            return
+        o = msg['o']
+        self._record_order_update(Order(o['i'], o['s'], o['S'], o['o'], float(o['q']), float(o['p']), o['X']))
+
+    @_normalize_symbol
+    def get_open_orders(self, symbol: Optional[str] = None) -> 'pd.DataFrame':
+        import pandas as pd
+        if self._user_stream is not None:
+            with self._open_orders_lock:
+                rows = [_order_row(o) for o in self._open_orders_cache.values() if not symbol or o.symbol == symbol]
+            df = pd.DataFrame.from_records(rows, columns=ORDER_COLUMNS)
+        else:
+            params = {'symbol': symbol} if symbol else {}
+            orders = self.client.futures_get_open_orders(**params)
+            df = pd.DataFrame(orders, columns=['orderId', 'symbol', 'side', 'type', 'origQty', 'price', 'status'])
+            df.rename(columns={'orderId': 'order_id', 'origQty': 'quantity'}, inplace=True)
+        # float64 regardless of source or row count; to_numeric would give int64 for whole-number prices
+        dtypes = {'quantity': float, 'price': float}
+        # Arrow-backed strings hand straight to st.dataframe's Arrow serializer without an object copy
+        dtypes.update({c: 'string[pyarrow]' for c in ('symbol', 'side', 'type', 'status')})
+        return df.astype(dtypes)
+
+    @_normalize_symbol
+    def place_market_order(self, symbol: str, side: str, quantity: str) -> Order:
         formatted_quantity = self._validate_and_format_quantity(symbol, quantity)
         order = self.client.futures_create_order(
-            symbol=symbol.upper(), side=side.upper(), type='MARKET', quantity=formatted_quantity
+            symbol=symbol, side=side.upper(), type='MARKET', quantity=formatted_quantity
         )
-        return self._format_order_response(order)
+        result = self._format_order_response(order)
+        # Don't wait for the websocket event to show the order in the streamed cache
+        self._record_order_update(result)
+        return result
 
-    def place_limit_order(self, symbol: str, side: str, quantity: float, price: float) -> Dict[str, Any]:
+    @_normalize_symbol
+    def place_limit_order(self, symbol: str, side: str, quantity: str, price: str) -> Order:
         formatted_quantity = self._validate_and_format_quantity(symbol, quantity)
+        price = price.strip()
+        if not _DECIMAL_RE.fullmatch(price):
+            raise ValueError(f"Invalid price: {price!r}")
         order = self.client.futures_create_order(
-            symbol=symbol.upper(), side=side.upper(), type='LIMIT',
-            timeInForce='GTC', quantity=formatted_quantity, price=f"{price}"
+            symbol=symbol, side=side.upper(), type='LIMIT',
+            timeInForce='GTC', quantity=formatted_quantity, price=price
         )
-        return self._format_order_response(order)
+        result = self._format_order_response(order)
+        self._record_order_update(result)
+        return result
     
+    async def fetch_dashboard(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """Fetches balance, open orders and (optionally) price concurrently."""
+        calls = [
+            asyncio.to_thread(self.get_account_balance),
+            asyncio.to_thread(self.get_open_orders),
+        ]
+        if symbol:
+            calls.append(asyncio.to_thread(self.get_current_price, symbol))
+        results = await asyncio.gather(*calls)
+        dashboard = {'balance': results[0], 'open_orders': results[1]}
+        if symbol:
+            dashboard['price'] = results[2]
+        return dashboard
+
+    @_normalize_symbol
     def cancel_order(self, symbol: str, order_id: int) -> Dict[str, Any]:
-        return self.client.futures_cancel_order(symbol=symbol.upper(), orderId=order_id)
+        result = self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+        self._record_order_update(self._format_order_response(result))
+        return result
 
-    def _format_order_response(self, order: Dict[str, Any]) -> Dict[str, Any]:
-        """Formats the raw order from Binance into a consistent dictionary."""
-        return {
-            'order_id': order['orderId'],
-            'symbol': order['symbol'],
-            'side': order['side'],
-            'type': order['type'],
-            'quantity': float(order['origQty']),
-            'price': float(order.get('price', 0)),
-            'status': order['status'],
-        }
+    def _format_order_response(self, order: Dict[str, Any]) -> Order:
+        """Formats the raw order from Binance into an Order."""
+        return Order(
+            order['orderId'], order['symbol'], order['side'], order['type'],
+            float(order['origQty']), float(order.get('price', 0)), order['status'],
+        )
 
 class TradingBotCLI:
     """Command Line Interface for the Trading Bot"""
@@ -188,10 +428,11 @@ class TradingBotCLI:
             print(f"{Fore.WHITE}Total Margin Balance: {Fore.GREEN}${balance['total_margin_balance']:.2f}")
             print(f"{Fore.WHITE}Available Balance:    {Fore.GREEN}${balance['available_balance']:.2f}")
             print(f"{Fore.WHITE}Unrealized PnL:       {pnl_color}${balance['total_unrealized_pnl']:.2f}")
-            if balance['balances']:
-                headers = ['Asset', 'Wallet Balance']
-                rows = [[b['asset'], f"${float(b['walletBalance']):.2f}"] for b in balance['balances']]
-                print(tabulate(rows, headers=headers, tablefmt="grid"))
+            if not balance['balances'].empty:
+                print(f"{'Asset':<10} {'Wallet Balance':>16}\n{'-'*27}")
+                print("\n".join(
+                    f"{asset:<10} ${wallet:>15.2f}" for asset, wallet in balance['balances'].itertuples(index=False)
+                ))
         except Exception as e:
             print(f"{Fore.RED}[X] Failed to get balance: {e}")
 
@@ -208,13 +449,13 @@ class TradingBotCLI:
         try:
             symbol = input(f"{Fore.CYAN}Enter symbol (e.g., BTCUSDT): ").strip().upper()
             side = input(f"{Fore.CYAN}Enter side (BUY/SELL): ").strip().upper()
-            quantity = float(input(f"{Fore.CYAN}Enter quantity: ").strip())
+            quantity = input(f"{Fore.CYAN}Enter quantity: ").strip()
             
-            if side not in ['BUY', 'SELL'] or quantity <= 0:
-                raise ValueError("Invalid side or quantity.")
+            if side not in ['BUY', 'SELL']:
+                raise ValueError("Invalid side.")
 
             if order_type == 'LIMIT':
-                price = float(input(f"{Fore.CYAN}Enter limit price: ").strip())
+                price = input(f"{Fore.CYAN}Enter limit price: ").strip()
                 result = self.bot.place_limit_order(symbol, side, quantity, price)
             else: # MARKET
                 result = self.bot.place_market_order(symbol, side, quantity)
@@ -227,15 +468,14 @@ class TradingBotCLI:
     def show_open_orders(self):
         try:
             orders = self.bot.get_open_orders()
-            if not orders:
+            if orders.empty:
                 print(f"{Fore.BLUE}No open orders found.")
                 return
-            headers = ['ID', 'Symbol', 'Side', 'Type', 'Qty', 'Price', 'Status']
-            rows = [
-                [o['order_id'], o['symbol'], o['side'], o['type'], 
-                 o['quantity'], f"${o['price']:.2f}", o['status']] for o in orders
-            ]
-            print(tabulate(rows, headers=headers, tablefmt="grid"))
+            print(f"{'ID':>12} {'Symbol':<10} {'Side':<5} {'Type':<8} {'Qty':>10} {'Price':>11} {'Status':<10}\n{'-'*72}")
+            print("\n".join(
+                f"{o.order_id:>12} {o.symbol:<10} {o.side:<5} {o.type:<8} {o.quantity:>10.4f} ${o.price:>10.2f} {o.status:<10}"
+                for o in orders.itertuples(index=False)
+            ))
         except Exception as e:
             print(f"{Fore.RED}[X] Failed to get open orders: {e}")
             
@@ -243,23 +483,23 @@ class TradingBotCLI:
         try:
             self.show_open_orders()
             orders = self.bot.get_open_orders()
-            if not orders: return
+            if orders.empty: return
             
             order_id = int(input(f"\n{Fore.CYAN}Enter Order ID to cancel: ").strip())
-            target_order = next((o for o in orders if o['order_id'] == order_id), None)
+            target_order = orders[orders['order_id'] == order_id]
             
-            if not target_order:
+            if target_order.empty:
                 print(f"{Fore.RED}[X] Order ID not found.")
                 return
 
-            result = self.bot.cancel_order(target_order['symbol'], order_id)
+            result = self.bot.cancel_order(target_order['symbol'].iloc[0], order_id)
             print(f"\n{Fore.GREEN}[+] Order {order_id} cancelled successfully.")
         except Exception as e:
             print(f"{Fore.RED}[X] Failed to cancel order: {e}")
 
-    def _display_order_result(self, result: Dict[str, Any]):
+    def _display_order_result(self, result: Order):
         print(f"{Fore.CYAN}{'-'*20}")
-        for key, value in result.items():
+        for key, value in asdict(result).items():
             print(f"{Fore.WHITE}{key.replace('_', ' ').title()}: {Fore.GREEN}{value}")
         print(f"{Fore.CYAN}{'-'*20}")
     
@@ -301,6 +541,8 @@ class TradingBotCLI:
 
 def main():
     """Main entry point"""
+    # Initialize colorama
+    init(autoreset=True)
     try:
         cli = TradingBotCLI()
         cli.run()